@@ -1,15 +1,17 @@
-import os, re, pathlib, asyncio
+import os, re, time, shelve, pathlib, asyncio, functools
+from concurrent.futures import ProcessPoolExecutor
 import logging
+from collections import OrderedDict
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyParameters
-from telegram.constants import ParseMode
+from telegram.constants import ParseMode, ChatAction
 from telegram.ext import (
-    ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters
+    AIORateLimiter, ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters
 )
 from solver import (
     WordleSolver, extract_guess_pairs_from_text, visualize_guess_line,
     build_constraints_report, build_pattern_string, deduce_grays_display,
     mdev_escape, allowed_letters_by_position, green_patterns_lines, yellow_patterns_lines,
-    accumulate_constraints
+    accumulate_constraints, init_worker, worker_solve_and_rank
 )
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
@@ -17,9 +19,29 @@ log = logging.getLogger("wordseek-ui-bot")
 
 TOKEN = os.environ.get("BOT_TOKEN", "").strip()
 WORDLIST_PATH = os.environ.get("WORDLIST_PATH", "words.txt").strip()
-
-solver = None
-SESSION = {}
+# >0 runs .db and /inf solves in that many worker processes; 0 keeps them on a thread
+SOLVE_WORKERS = int(os.environ.get("SOLVE_WORKERS", "0").strip() or 0)
+# Opt-in: pagination sessions are snapshotted here so a restart doesn't strand open .db/.find
+# messages. They include the replied-to chat text, so nothing is written unless this is set.
+SESSION_PATH = os.environ.get("SESSION_PATH", "").strip()
+SESSION_SNAPSHOT_EVERY = 60
+# Updates handled at once; the solver threads/processes are the real bottleneck, so keep it bounded
+CONCURRENT_UPDATES = int(os.environ.get("CONCURRENT_UPDATES", "32").strip() or 32)
+
+class _State:
+    solver: WordleSolver = None
+    version: int = 0
+    pool: ProcessPoolExecutor | None = None
+    top_md: str = ""
+    # identifies the loaded wordlist across restarts, so restored sessions know if they're stale
+    wordlist_stamp: tuple = ()
+    # set when the wordlist can't be loaded, so commands report it instead of "Loading…" forever
+    load_error: str = ""
+
+# (chat_id, message_id) -> (last_used, state), least recently used first
+SESSION: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+SESSION_MAX = 256
+SESSION_TTL = 3600
 PAGE_SIZE = 10
 
 HELP = (
@@ -28,6 +50,19 @@ HELP = (
     "Commands: .db /.gn /.yl /.find /.chack  /db /gn /yl /find /chack /inf /wstats /top /reload /help"
 )
 
+_MDV2 = ParseMode.MARKDOWN_V2
+# Pre-escaped constant replies
+START_MD = mdev_escape("WordSeek Solver ready.\n" + HELP)
+HELP_MD = mdev_escape(HELP)
+REPLY_DB_MD = mdev_escape("Reply to a guesses message with .db")
+REPLY_INF_MD = mdev_escape("Reply to a guesses message with /inf")
+REPLY_GN_MD = mdev_escape("Reply to guesses with /.gn")
+REPLY_YL_MD = mdev_escape("Reply to guesses with /.yl")
+FIND_USAGE_MD = mdev_escape("Usage:\n/.find s t o _ _\n/.find sto__\n/.find l  (letter mode)")
+LOADING_TEXT = "Loading wordlist, try again in a moment."
+
+# Keyboards are immutable once built, so identical ones are shared between messages
+@functools.lru_cache(maxsize=1024)
 def build_keyboard(best_word: str, page: int, has_next: bool, has_prev: bool):
     rows = []
     nav = []
@@ -43,6 +78,69 @@ def build_keyboard(best_word: str, page: int, has_next: bool, has_prev: bool):
     ])
     return InlineKeyboardMarkup(rows)
 
+def session_put(key: tuple, state: dict):
+    now = time.monotonic()
+    SESSION[key] = (now, state)
+    SESSION.move_to_end(key)
+    while SESSION:
+        oldest = next(iter(SESSION.values()))[0]
+        if len(SESSION) <= SESSION_MAX and now - oldest <= SESSION_TTL:
+            break
+        SESSION.popitem(last=False)
+
+def session_get(key: tuple):
+    entry = SESSION.get(key)
+    if entry is None:
+        return None
+    now = time.monotonic()
+    if now - entry[0] > SESSION_TTL:
+        del SESSION[key]
+        return None
+    SESSION[key] = (now, entry[1])
+    SESSION.move_to_end(key)
+    return entry[1]
+
+def _write_sessions(path: str, entries: list):
+    with shelve.open(path) as db:
+        db["sessions"] = entries
+
+async def save_sessions():
+    if not SESSION_PATH:
+        return
+    # copy on the loop, pickle on a thread; ages go to disk as wall-clock times since monotonic doesn't survive restarts
+    mono, wall = time.monotonic(), time.time()
+    entries = [(key, wall - (mono - used), dict(state)) for key, (used, state) in SESSION.items()]
+    try:
+        await asyncio.to_thread(_write_sessions, abs_path(SESSION_PATH), entries)
+    except Exception:
+        log.exception("Saving sessions failed")
+
+def restore_sessions():
+    if not SESSION_PATH:
+        return
+    try:
+        with shelve.open(abs_path(SESSION_PATH), flag="r") as db:
+            entries = db.get("sessions", [])
+    except Exception:
+        return
+    mono, wall = time.monotonic(), time.time()
+    for key, saved_at, state in entries:
+        age = wall - saved_at
+        if 0 <= age <= SESSION_TTL:
+            SESSION[key] = (mono - age, state)
+    log.info("Restored %d sessions", len(SESSION))
+
+async def snapshot_sessions_loop():
+    while True:
+        await asyncio.sleep(SESSION_SNAPSHOT_EVERY)
+        # a cancel mid-write still lets the write finish, so the final save in post_shutdown can't race it
+        save = asyncio.ensure_future(save_sessions())
+        try:
+            await asyncio.shield(save)
+        except asyncio.CancelledError:
+            await save
+            raise
+
 async def safe_delete_message(update: Update):
     try:
         if update.effective_message:
@@ -50,101 +148,160 @@ async def safe_delete_message(update: Update):
     except Exception:
         pass
 
+async def show_typing(chat):
+    # one call, expires by itself; nothing to edit or delete afterwards
+    try:
+        await chat.send_chat_action(ChatAction.TYPING)
+    except Exception:
+        pass
+
 def abs_path(p: str) -> str:
     if os.path.isabs(p): return p
     return str((pathlib.Path(__file__).parent / p).resolve())
 
+# Callbacks edit shared session state across awaits; serialize them per chat only.
+# chat id -> [lock, holders + waiters]; an entry is dropped when its last user leaves
+_CHAT_LOCKS: "dict[int, list]" = {}
+
+def per_chat_lock(fn):
+    @functools.wraps(fn)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not update.effective_chat:
+            return await fn(update, context)
+        chat_id = update.effective_chat.id
+        entry = _CHAT_LOCKS.setdefault(chat_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await fn(update, context)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del _CHAT_LOCKS[chat_id]
+    return wrapper
+
+def requires_solver(fn):
+    @functools.wraps(fn)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if _State.solver is None:
+            text = f"Wordlist failed to load ({_State.load_error}); fix it and /reload." if _State.load_error else LOADING_TEXT
+            if update.callback_query:
+                await update.callback_query.answer(text[:200])
+            elif update.effective_message:
+                await update.effective_message.reply_text(mdev_escape(text), parse_mode=_MDV2)
+            return
+        return await fn(update, context)
+    return wrapper
+
 async def start_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(mdev_escape("WordSeek Solver ready.\n" + HELP), parse_mode=ParseMode.MARKDOWN_V2)
+    await update.message.reply_text(START_MD, parse_mode=_MDV2)
 
 async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(mdev_escape(HELP), parse_mode=ParseMode.MARKDOWN_V2)
+    await update.message.reply_text(HELP_MD, parse_mode=_MDV2)
+
+def set_solver(new_solver: WordleSolver, path: str):
+    if SOLVE_WORKERS > 0:
+        old = _State.pool
+        _State.pool = ProcessPoolExecutor(SOLVE_WORKERS, initializer=init_worker, initargs=(path,))
+        if old:
+            old.shutdown(wait=False)
+    _State.solver = new_solver
+    _State.version += 1
+    st = os.stat(path)
+    _State.wordlist_stamp = (path, st.st_mtime_ns, st.st_size)
+    # the full-list ranking is fixed per wordlist, so /top is rendered once here
+    top = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(new_solver.global_ranked[:20]))
+    _State.top_md = mdev_escape("Top starters:\n" + top)
+    _cached_solve_and_rank.cache_clear()
+    _rank_frozen.cache_clear()
+
+@functools.lru_cache(maxsize=1)
+def _load_solver(path: str, mtime_ns: int) -> WordleSolver:
+    return WordleSolver.from_file(path)
+
+async def load_solver(path: str):
+    try:
+        solver = await asyncio.to_thread(_load_solver, path, os.stat(path).st_mtime_ns)
+    except Exception as e:
+        _State.load_error = f"{type(e).__name__}: {e}"
+        raise
+    _State.load_error = ""
+    # an unchanged file hands back the current solver; keep its caches and version
+    if solver is not _State.solver:
+        set_solver(solver, path)
 
 async def reload_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    global solver
     path = abs_path(WORDLIST_PATH)
-    solver = WordleSolver.from_file(path)
-    await update.message.reply_text(mdev_escape(f"Reloaded {len(solver.words)} words from {path}."), parse_mode=ParseMode.MARKDOWN_V2)
+    try:
+        await load_solver(path)
+    except Exception as e:
+        log.exception("Reloading %s failed", path)
+        kept = f" Still using the previous {len(_State.solver.words)} words." if _State.solver else ""
+        await update.message.reply_text(mdev_escape(f"Reload failed: {e}.{kept}"), parse_mode=_MDV2)
+        return
+    await update.message.reply_text(mdev_escape(f"Reloaded {len(_State.solver.words)} words from {path}."), parse_mode=_MDV2)
+
+@functools.lru_cache(maxsize=4)
+def _wordlist_stats(path: str, mtime_ns: int):
+    raw = [ln for ln in pathlib.Path(path).read_text(encoding="utf-8").splitlines() if ln.strip()]
+    return len(raw), len(WordleSolver.sanitize_word_list(raw))
 
 async def wstats_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     path = abs_path(WORDLIST_PATH)
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            raw = [ln.strip() for ln in f if ln.strip()]
-        from solver import WordleSolver as WS
-        sanitized = WS.sanitize_word_list(raw)
-        msg = f"File: {path}\nRaw lines: {len(raw)}\n5-letter sanitized: {len(sanitized)}\nLoaded in solver: {len(solver.words) if solver else 0}"
-        await update.message.reply_text(mdev_escape(msg), parse_mode=ParseMode.MARKDOWN_V2)
+        raw_count, sanitized_count = _wordlist_stats(path, os.stat(path).st_mtime_ns)
+        msg = f"File: {path}\nRaw lines: {raw_count}\n5-letter sanitized: {sanitized_count}\nLoaded in solver: {len(_State.solver.words) if _State.solver else 0}"
+        await update.message.reply_text(mdev_escape(msg), parse_mode=_MDV2)
     except Exception as e:
-        await update.message.reply_text(mdev_escape(f"wstats error: {e}"), parse_mode=ParseMode.MARKDOWN_V2)
+        await update.message.reply_text(mdev_escape(f"wstats error: {e}"), parse_mode=_MDV2)
 
+@requires_solver
 async def top_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    ranked = solver.rank_words(solver.words)[:20]
-    lines = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(ranked))
-    await update.message.reply_text(mdev_escape("Top starters:\n" + lines), parse_mode=ParseMode.MARKDOWN_V2)
+    await update.message.reply_text(_State.top_md, parse_mode=_MDV2)
 
-def build_allowed_grid_hint(result):
-    allowed = allowed_letters_by_position(result["greens"], result["yellows_not_pos"], result["min_counts"], result["max_counts"])
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+@functools.lru_cache(maxsize=256)
+def _allowed_grid_hint(greens_key: tuple, yellows_key: tuple, max_key: tuple) -> str:
+    allowed = allowed_letters_by_position(dict(greens_key), dict(yellows_key), None, dict(max_key))
     lines = []
-    for i in range(5):
-        col = "".join(sorted(allowed[i])) if allowed[i] else "-"
-        lines.append(f"  {i+1}: {col}")
+    for i, col in enumerate(allowed):
+        # columns are alphabet subsets (or a single green), so scan in order instead of sorting
+        letters = "".join(ch for ch in _ALPHABET if ch in col) if len(col) > 1 else "".join(col)
+        lines.append(f"  {i+1}: {letters or '-'}")
     return "\n".join(lines)
 
-def pattern_matches_strict(greens: dict, yellows_not_pos: dict, wordlist: list[str]) -> list[str]:
-    out = []
-    for w in wordlist:
-        ok = True
-        for i, ch in greens.items():
-            if w[i] != ch:
-                ok = False; break
-        if not ok: continue
-        for ch, banned in yellows_not_pos.items():
-            if ch not in w:
-                ok = False; break
-            for pos in banned:
-                if w[pos] == ch:
-                    ok = False; break
-            if not ok: break
-        if ok:
-            out.append(w)
-    return out
+def build_allowed_grid_hint(result):
+    return _allowed_grid_hint(
+        tuple(result["greens"].items()), tuple(result["yellows_not_pos"].items()), tuple(result["max_counts"].items())
+    )
+
+def _fmt_greens(greens: dict) -> str:
+    return ", ".join(f"{i+1}:{ch}" for i, ch in greens.items()) or "-"
+
+def _fmt_yellows(yellows_np: dict) -> str:
+    return ", ".join(f"{ch} !@ {','.join(str(i+1) for i in pos)}" for ch, pos in yellows_np.items()) or "-"
+
+def _fmt_counts(counts: dict) -> str:
+    return ", ".join(f"{l}:{v}" for l, v in counts.items()) or "-"
 
 def format_matches(words: list[str], limit=20) -> str:
     return ", ".join(words[:limit]) if words else "-"
 
-async def quoted_send(chat, text, src_msg=None):
+async def quoted_send_md(chat, text_md, src_msg=None, reply_markup=None):
     rp = None
     if src_msg:
         try:
             rp = ReplyParameters(message_id=src_msg.message_id, quote_parse_mode="MarkdownV2")
         except Exception:
             rp = None
-    return await chat.send_message(mdev_escape(text), parse_mode=ParseMode.MARKDOWN_V2, reply_parameters=rp)
+    return await chat.send_message(text_md, parse_mode=_MDV2, reply_parameters=rp, reply_markup=reply_markup)
 
-# Pagination helpers for .find
-def chunk(items, start, size):
-    end = min(start + size, len(items))
-    return items[start:end], end < len(items), start > 0
-
-def make_find_keyboard(page, has_next, has_prev):
-    rows = []
-    nav = []
-    if has_prev:
-        nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"findpg:{page-1}"))
-    if has_next:
-        nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"findpg:{page+1}"))
-    if nav:
-        rows.append(nav)
-    return InlineKeyboardMarkup(rows) if rows else None
-
-def render_find_list(items, page, title):
-    start = page * PAGE_SIZE
-    view, has_next, has_prev = chunk(items, start, PAGE_SIZE)
-    body = "\n".join(f"{i+1}. {w}" for i, w in enumerate(view, start=start))
-    head = f"{title} (page {page+1})"
-    return head + "\n" + body, has_next, has_prev
+async def quoted_send(chat, text, src_msg=None, reply_markup=None):
+    return await quoted_send_md(chat, mdev_escape(text), src_msg, reply_markup)
 
+# Pagination helpers for .find
+@functools.lru_cache(maxsize=None)
 def make_find_mode_keyboard():
     rows = [[
         InlineKeyboardButton("🧠 Smart find", callback_data="findmode:smart"),
@@ -152,16 +309,27 @@ def make_find_mode_keyboard():
     ]]
     return InlineKeyboardMarkup(rows)
 
-def render_ranked_list(ranked_items: list[tuple], page: int, title: str):
-    start = page * PAGE_SIZE
-    end = min(start + PAGE_SIZE, len(ranked_items))
-    view = ranked_items[start:end]
-    body = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(view, start=start))
-    head = f"{title} (page {page+1})"
-    has_next = end < len(ranked_items)
-    has_prev = start > 0
-    return head + "\n" + body, has_next, has_prev
-
+def find_pages_md(lines: list[str], title: str) -> list[str]:
+    # every page is rendered and escaped when the mode is picked; paging is then a list lookup
+    count = max(1, -(-len(lines) // PAGE_SIZE))
+    return [
+        mdev_escape(f"{title} (page {p+1})\n" + "\n".join(lines[p * PAGE_SIZE:(p + 1) * PAGE_SIZE]))
+        for p in range(count)
+    ]
+
+def find_page_view(pages_md: list[str], page: int, mode_tag: str):
+    return pages_md[page], make_find_keyboard_with_ns(page, page + 1 < len(pages_md), page > 0, mode_tag)
+
+def db_pages_md(ranked) -> list[str]:
+    # escape the whole list in one translate, then cut it into pages
+    text = "\n".join(f"{i}. {w} ({sc})" for i, (w, sc) in enumerate(ranked, 1))
+    lines = mdev_escape(text).split("\n")
+    return [
+        f"Top suggestions \\(page {p+1}\\):\n" + "\n".join(lines[p * PAGE_SIZE:(p + 1) * PAGE_SIZE])
+        for p in range(-(-len(lines) // PAGE_SIZE))
+    ]
+
+@functools.lru_cache(maxsize=256)
 def make_find_keyboard_with_ns(page: int, has_next: bool, has_prev: bool, mode_tag: str):
     rows = []
     nav = []
@@ -173,132 +341,157 @@ def make_find_keyboard_with_ns(page: int, has_next: bool, has_prev: bool, mode_t
         rows.append(nav)
     return InlineKeyboardMarkup(rows) if rows else None
 
+# One letter, five space-separated cells, or five packed cells; non-letter cells are blanks
+_PAT_RE = re.compile(r"([a-z])|(\S)\s+(\S)\s+(\S)\s+(\S)\s+(\S)|(\S{5})")
+
 def parse_pattern_or_letter(args: list[str]) -> tuple[str, str]:
-    if not args: return ("", "")
-    raw = " ".join(args).strip().lower()
-    if len(raw) == 1 and raw.isalpha():
-        return ("letter", raw)
-    if " " in raw:
-        parts = raw.split()
-        if len(parts) == 5 and all(len(p) == 1 for p in parts):
-            patt = " ".join(p if p.isalpha() else "_" for p in parts)
-            return ("pattern", patt)
+    m = _PAT_RE.fullmatch(" ".join(args).strip().lower())
+    if not m:
         return ("", "")
-    if len(raw) == 5:
-        patt = " ".join(ch if ch.isalpha() else "_" for ch in raw)
-        return ("pattern", patt)
-    return ("", "")
+    if m.group(1):
+        return ("letter", m.group(1))
+    cells = m.group(7) or m.group(2, 3, 4, 5, 6)
+    return ("pattern", " ".join(ch if ch.isalpha() else "_" for ch in cells))
 
-def filter_by_letter(letter: str, wordlist: list[str]) -> list[str]:
-    letter = letter.lower()
-    return [w for w in wordlist if letter in w]
+# Both filters run on the solver's per-letter/per-position bitsets rather than scanning words
+def filter_by_letter(letter: str, solver: WordleSolver) -> tuple[str, ...]:
+    return solver.by_letter.get(letter.lower(), ())
 
-def filter_by_pattern_and_yellows(pattern_str: str, yellows_np: dict, wordlist: list[str]) -> list[str]:
+def filter_by_pattern_and_yellows(pattern_str: str, yellows_np: dict, solver: WordleSolver) -> list[str]:
     parts = pattern_str.split()
     if len(parts) != 5:
         return []
     greens = {i: p for i, p in enumerate(parts) if p != "_"}
-    return pattern_matches_strict(greens, yellows_np, wordlist)
+    return solver.pattern_matches(greens, yellows_np)
+
+@functools.lru_cache(maxsize=512)
+def _parse_and_accumulate(text: str):
+    # parsing doesn't depend on the wordlist, so this survives /reload
+    pairs = tuple(extract_guess_pairs_from_text(text))
+    return pairs, accumulate_constraints(pairs)
+
+# pools above this skip the rank cache: hashing the tuple key costs O(n) per lookup, and each
+# entry would hold the pool twice (key and ranking)
+RANK_CACHE_MAX_WORDS = 2048
+
+@functools.lru_cache(maxsize=256)
+def _rank_frozen(cand_tuple: tuple, version: int, k: int | None) -> tuple:
+    return tuple(_State.solver.rank_words(list(cand_tuple), k))
+
+def rank_cached(cands: list[str], k: int | None = None):
+    # the full list is already ranked at load; don't hash or cache it again
+    if len(cands) == len(_State.solver.words):
+        return _State.solver.global_ranked[:k]
+    if len(cands) > RANK_CACHE_MAX_WORDS:
+        return _State.solver.rank_words(cands, k)
+    return _rank_frozen(tuple(cands), _State.version, k)
+
+@functools.lru_cache(maxsize=512)
+def _cached_solve_and_rank(text_key: str, version: int):
+    if _State.pool is not None:
+        return _State.pool.submit(worker_solve_and_rank, text_key).result()
+    pairs, _ = _parse_and_accumulate(text_key)
+    result = _State.solver.solve(pairs)
+    ranked = rank_cached(result["candidates"])
+    return pairs, result, ranked
+
+def _format_no_candidates(result) -> str:
+    greens_map = result["greens"]
+    yellows_np = result["yellows_not_pos"]
+    bans = ", ".join(f"{ch}!@{','.join(str(i+1) for i in pos)}" for ch, pos in yellows_np.items()) or "-"
+    strict_matches = _State.solver.pattern_matches(greens_map, yellows_np)
+    return "\n".join([
+        "No candidates. Check inputs or wordlist.",
+        "Pattern hints:",
+        f"• Greens: {_fmt_greens(greens_map)}",
+        f"• Must-have counts: {_fmt_counts(result['min_counts'])}",
+        f"• Yellow bans: {bans}",
+        f"• Allowed letters per position:\n{build_allowed_grid_hint(result)}",
+        *green_patterns_lines(greens_map),
+        *yellow_patterns_lines(yellows_np),
+        f"Pattern matches from words.txt (greens+yellow bans, top 20): {format_matches(strict_matches)}",
+    ])
+
+def _format_analysis_header(pairs, result, ranked) -> str:
+    return "\n".join([
+        "Analysis:",
+        f"✅ Greens: {_fmt_greens(result['greens'])}",
+        f"🟨 Yellows: {_fmt_yellows(result['yellows_not_pos'])}",
+        f"❌ Grays: {deduce_grays_display(pairs)}",
+        f"Pattern: {build_pattern_string(result)}",
+        f"Remaining: {len(ranked)}",
+        f"👉 Suggestions: {', '.join(w for w, _ in ranked[:3])}",
+        f"🎯 Best Answer: `{ranked[0][0]}`",
+        "",
+    ])
 
+def _render_db_analysis(text, pairs, result, ranked):
+    best = ranked[0][0]
+    page = 0
+    header = _format_analysis_header(pairs, result, ranked)
+    # solve() already enforces greens and yellow bans, so every candidate is a pattern match
+    footer = f"\nPattern matches (greens+yellow bans): {format_matches(result['candidates'])}"
+    state = {
+        "pages_md": db_pages_md(ranked), "page": page, "best": best,
+        "header_md": mdev_escape(header), "footer_md": mdev_escape(footer),
+        # what Refresh needs to redo the analysis once the wordlist changes
+        "text": text, "wordlist_stamp": _State.wordlist_stamp,
+    }
+    text_md, markup = render_db_page(state, page)
+    state["last_rendered"] = text_md
+    return text_md, markup, state
+
+def render_db_page(state: dict, page: int):
+    # pages are pre-rendered and escaped in the session; a press is a list lookup
+    pages = state["pages_md"]
+    text_md = state["header_md"] + pages[page] + state["footer_md"]
+    return text_md, build_keyboard(state["best"], page, page + 1 < len(pages), page > 0)
+
+@requires_solver
 async def dot_db_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await safe_delete_message(update)
     chat = update.effective_chat
     src = update.message.reply_to_message if update.message else None
-    if not src or not src.text:
-        await quoted_send(chat, "Reply to a guesses message with .db", src); return
+    text = src.text.strip() if src and src.text else ""
+    if not text:
+        await asyncio.gather(safe_delete_message(update), quoted_send_md(chat, REPLY_DB_MD, src))
+        return
 
-    scan = await chat.send_message(mdev_escape("scanning ..."), parse_mode=ParseMode.MARKDOWN_V2)
+    markup = state = None
     try:
-        await scan.edit_text(mdev_escape("wait ..."), parse_mode=ParseMode.MARKDOWN_V2)
-        pairs = extract_guess_pairs_from_text(src.text)
-        await scan.edit_text(mdev_escape("done"), parse_mode=ParseMode.MARKDOWN_V2)
-
-        result = solver.solve(pairs)
-        cands = result["candidates"]
-        greens_map = result["greens"]
-        yellows_np = result["yellows_not_pos"]
-
-        if not cands:
-            greens = ", ".join([f"{i+1}:{ch}" for i, ch in sorted(greens_map.items())]) or "-"
-            must_have = ", ".join([f"{l}:{v}" for l, v in sorted(result["min_counts"].items())]) or "-"
-            bans = ", ".join(f"{ch}!@{','.join(str(i+1) for i in sorted(pos))}" for ch, pos in sorted(yellows_np.items())) or "-"
-            allowed_grid = build_allowed_grid_hint(result)
-            green_lines = "\n".join(green_patterns_lines(greens_map))
-            yellow_lines = "\n".join(yellow_patterns_lines(yellows_np))
-            strict_matches = pattern_matches_strict(greens_map, yellows_np, solver.words)
-            msg = (
-                "No candidates. Check inputs or wordlist.\n"
-                "Pattern hints:\n"
-                f"• Greens: {greens}\n"
-                f"• Must-have counts: {must_have}\n"
-                f"• Yellow bans: {bans}\n"
-                f"• Allowed letters per position:\n{allowed_grid}\n"
-                f"{green_lines}\n"
-                f"{yellow_lines}\n"
-                f"Pattern matches from words.txt (greens+yellow bans, top 20): {format_matches(strict_matches)}"
-            )
-            await quoted_send(chat, msg, src)
-            return
-
-        ranked = solver.rank_words(cands)
-        best = ranked
-        pattern = build_pattern_string(result)
-        greens = ", ".join([f"{i+1}:{ch}" for i, ch in sorted(greens_map.items())]) or "-"
-        yellows = ", ".join([f"{ch} !@ {','.join(str(i+1) for i in sorted(pos))}" for ch, pos in sorted(yellows_np.items())]) or "-"
-        minc = ", ".join([f"{l}:{v}" for l, v in sorted(result["min_counts"].items())]) or "-"
-        maxc = ", ".join([f"{l}:{v}" for l, v in sorted(result["max_counts"].items())]) or "-"
-        grays = deduce_grays_display(pairs)
-        strict_matches = pattern_matches_strict(greens_map, yellows_np, cands)
-
-        page = 0
-        total = len(ranked)
-        start = page * PAGE_SIZE
-        end = min(start + PAGE_SIZE, total)
-        top_list = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(ranked[start:end], start=start))
-
-        msg = (
-            "Analysis:\n"
-            f"✅ Greens: {greens}\n"
-            f"🟨 Yellows: {yellows}\n"
-            f"❌ Grays: {grays}\n"
-            f"Pattern: {pattern}\n"
-            f"Remaining: {total}\n"
-            f"👉 Suggestions: {', '.join(w for w, _ in ranked[:3])}\n"
-            f"🎯 Best Answer: `{best}`\n"
-            f"Top suggestions \\(page {page+1}\\):\n{top_list}\n"
-            f"Pattern matches \\(greens+yellow bans\\): {format_matches(strict_matches)}"
-        )
-        sent = await quoted_send(chat, msg, src)
-        SESSION[(sent.chat_id, sent.message_id)] = {"ranked": ranked, "page": page, "best": best}
+        pairs, result, ranked = await asyncio.to_thread(_cached_solve_and_rank, text, _State.version)
+        if not result["candidates"]:
+            reply_md = mdev_escape(_format_no_candidates(result))
+        else:
+            reply_md, markup, state = _render_db_analysis(text, pairs, result, ranked)
     except Exception as e:
-        try: await scan.edit_text(mdev_escape("error"), parse_mode=ParseMode.MARKDOWN_V2)
-        except: pass
-        await quoted_send(chat, f"Parse error: {e}", src)
+        reply_md = mdev_escape(f"Parse error: {e}")
 
+    _, sent = await asyncio.gather(safe_delete_message(update), quoted_send_md(chat, reply_md, src, markup))
+    if state:
+        session_put((sent.chat_id, sent.message_id), state)
+
+@requires_solver
 async def inf_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await safe_delete_message(update)
     chat = update.effective_chat
     src = update.message.reply_to_message if update.message else None
-    if not src or not src.text:
-        await quoted_send(chat, "Reply to a guesses message with /inf", src); return
+    text = src.text.strip() if src and src.text else ""
+    if not text:
+        await asyncio.gather(safe_delete_message(update), quoted_send_md(chat, REPLY_INF_MD, src))
+        return
 
-    step = await chat.send_message(mdev_escape("scanning ..."), parse_mode=ParseMode.MARKDOWN_V2)
     try:
-        await step.edit_text(mdev_escape("wait ..."), parse_mode=ParseMode.MARKDOWN_V2)
-        pairs = extract_guess_pairs_from_text(src.text)
-        await step.edit_text(mdev_escape("done"), parse_mode=ParseMode.MARKDOWN_V2)
-
+        pairs, result, _ = await asyncio.to_thread(_cached_solve_and_rank, text, _State.version)
         viz = "\n".join(visualize_guess_line(w, fb) for (w, fb) in pairs)
         report = build_constraints_report(pairs)
-        greens_map, yellows_np, _, _ = accumulate_constraints(pairs)
+        greens_map, yellows_np = result["greens"], result["yellows_not_pos"]
         green_lines = "\n".join(green_patterns_lines(greens_map))
         yellow_lines = "\n".join(yellow_patterns_lines(yellows_np))
-        greens_section = "Greens:\n" + ("\n".join(f"{ch.upper()} → position {i+1}" for i, ch in sorted(greens_map.items())) if greens_map else "—")
+        greens_section = "Greens:\n" + ("\n".join(f"{ch.upper()} → position {i+1}" for i, ch in greens_map.items()) if greens_map else "—")
         yellows_section = "Yellows (banned positions):\n" + (
-            "\n".join(f"{ch.upper()} → not at {', '.join(str(i+1) for i in sorted(pos))}" for ch, pos in sorted(yellows_np.items()))
+            "\n".join(f"{ch.upper()} → not at {', '.join(str(i+1) for i in pos)}" for ch, pos in yellows_np.items())
             if yellows_np else "—"
         )
-        strict_matches = pattern_matches_strict(greens_map, yellows_np, solver.words)
+        strict_matches = _State.solver.pattern_matches(greens_map, yellows_np)
         final = (
             "Info:\nPer-guess breakdown:\n" + viz + "\n\n" +
             report + "\n\n" +
@@ -308,22 +501,19 @@ async def inf_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             yellow_lines + "\n" +
             "Matches from words.txt (greens+yellow bans): " + format_matches(strict_matches)
         )
-        await quoted_send(chat, final, src)
     except Exception as e:
-        try: await step.edit_text(mdev_escape("error"), parse_mode=ParseMode.MARKDOWN_V2)
-        except: pass
-        await quoted_send(chat, f"Parse error: {e}", src)
+        final = f"Parse error: {e}"
+    await asyncio.gather(safe_delete_message(update), quoted_send(chat, final, src))
 
 async def gn_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await safe_delete_message(update)
     chat = update.effective_chat
     src = update.message.reply_to_message if update.message else None
     if not src or not src.text:
-        await quoted_send(chat, "Reply to guesses with /.gn", src); return
+        await quoted_send_md(chat, REPLY_GN_MD, src); return
     try:
-        pairs = extract_guess_pairs_from_text(src.text)
-        greens_map, _, _, _ = accumulate_constraints(pairs)
-        greens_section = "Greens:\n" + ("\n".join(f"{ch.upper()} → position {i+1}" for i, ch in sorted(greens_map.items())) if greens_map else "—")
+        _, (greens_map, _, _, _) = _parse_and_accumulate(src.text.strip())
+        greens_section = "Greens:\n" + ("\n".join(f"{ch.upper()} → position {i+1}" for i, ch in greens_map.items()) if greens_map else "—")
         green_lines = "\n".join(green_patterns_lines(greens_map))
         await quoted_send(chat, greens_section + "\n" + green_lines, src)
     except Exception as e:
@@ -334,10 +524,9 @@ async def yl_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat = update.effective_chat
     src = update.message.reply_to_message if update.message else None
     if not src or not src.text:
-        await quoted_send(chat, "Reply to guesses with /.yl", src); return
+        await quoted_send_md(chat, REPLY_YL_MD, src); return
     try:
-        pairs = extract_guess_pairs_from_text(src.text)
-        _, yellows_np, _, _ = accumulate_constraints(pairs)
+        _, (_, yellows_np, _, _) = _parse_and_accumulate(src.text.strip())
         yellow_lines = "\n".join(yellow_patterns_lines(yellows_np))
         await quoted_send(chat, yellow_lines, src)
     except Exception as e:
@@ -351,28 +540,52 @@ async def find_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     yellows_np = {}
     if src and src.text:
         try:
-            pairs = extract_guess_pairs_from_text(src.text)
-            _, yellows_np, _, _ = accumulate_constraints(pairs)
+            _, (_, yellows_np, _, _) = _parse_and_accumulate(src.text.strip())
         except:
             yellows_np = {}
 
     mode, value = parse_pattern_or_letter(context.args)
     if not mode:
-        usage = "Usage:\n/.find s t o _ _\n/.find sto__\n/.find l  (letter mode)"
-        await quoted_send(chat, usage, src); return
+        await quoted_send_md(chat, FIND_USAGE_MD, src); return
 
     title = f"Letter query: '{value}'" if mode == "letter" else f"Pattern query: {value}"
-    sent = await quoted_send(chat, f"Choose find mode for: {title}", src)
-    SESSION[(sent.chat_id, sent.message_id)] = {
+    sent = await quoted_send(chat, f"Choose find mode for: {title}", src, make_find_mode_keyboard())
+    session_put((sent.chat_id, sent.message_id), {
         "mode": "find-choose",
         "query_type": mode,
         "query_value": value,
         "yellows_np": yellows_np,
         "src_msg_id": src.message_id if src else None,
         "title": title
-    }
-    await sent.edit_reply_markup(make_find_mode_keyboard())
+    })
+
+CHACK_TOP = 20
+
+def _chack_text(qmode: str, qvalue: str, greens_map: dict, yellows_np: dict) -> str:
+    if qmode == "letter":
+        base = filter_by_letter(qvalue, _State.solver)
+        ranked = rank_cached(base, CHACK_TOP)
+        title = f"Smart matches for letter '{qvalue}'"
+    elif qmode == "pattern":
+        base = filter_by_pattern_and_yellows(qvalue, yellows_np, _State.solver)
+        ranked = rank_cached(base, CHACK_TOP)
+        title = f"Smart matches for pattern {qvalue}"
+    else:
+        if greens_map or yellows_np:
+            base = _State.solver.pattern_matches(greens_map, yellows_np)
+            ranked = rank_cached(base, CHACK_TOP)
+            title = "Smart matches from replied constraints"
+        else:
+            ranked = _State.solver.global_ranked[:200]
+            title = "Smart matches (global top 200)"
 
+    if not ranked:
+        return title + "\n" + "No matches."
+    topn = ranked[:CHACK_TOP]
+    body = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(topn))
+    return title + "\n" + body
+
+@requires_solver
 async def chack_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await safe_delete_message(update)
     chat = update.effective_chat
@@ -382,83 +595,22 @@ async def chack_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     yellows_np = {}
     if src and src.text:
         try:
-            pairs = extract_guess_pairs_from_text(src.text)
-            greens_map, yellows_np, _, _ = accumulate_constraints(pairs)
+            _, (greens_map, yellows_np, _, _) = _parse_and_accumulate(src.text.strip())
         except:
             greens_map, yellows_np = {}, {}
 
     qmode, qvalue = parse_pattern_or_letter(context.args)
-    progress = await chat.send_message(mdev_escape("1…"), parse_mode=ParseMode.MARKDOWN_V2)
-
-    async def progress_loop(msg):
-        dots = 1
-        try:
-            while True:
-                dots = (dots % 10) + 1
-                txt = "".join(str(i) + "…" for i in range(1, dots+1))
-                await asyncio.sleep(0.25)
-                try:
-                    await msg.edit_text(mdev_escape(txt), parse_mode=ParseMode.MARKDOWN_V2)
-                except:
-                    break
-        except asyncio.CancelledError:
-            pass
-
-    loop_task = asyncio.create_task(progress_loop(progress))
-
     try:
-        if qmode == "letter":
-            base = filter_by_letter(qvalue, solver.words)
-            ranked = solver.rank_words(base)
-            title = f"Smart matches for letter '{qvalue}'"
-        elif qmode == "pattern":
-            base = filter_by_pattern_and_yellows(qvalue, yellows_np, solver.words)
-            ranked = solver.rank_words(base)
-            title = f"Smart matches for pattern {qvalue}"
-        else:
-            if greens_map or yellows_np:
-                base = pattern_matches_strict(greens_map, yellows_np, solver.words)
-                ranked = solver.rank_words(base)
-                title = "Smart matches from replied constraints"
-            else:
-                ranked = solver.rank_words(solver.words)[:200]
-                title = "Smart matches (global top 200)"
-
-        loop_task.cancel()
-        try:
-            await loop_task
-        except:
-            pass
-        try:
-            await progress.edit_text(mdev_escape("done ✅"), parse_mode=ParseMode.MARKDOWN_V2)
-        except:
-            pass
-
-        if not ranked:
-            final_txt = title + "\n" + "No matches."
-        else:
-            topn = ranked[:20]
-            body = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(topn))
-            final_txt = title + "\n" + body
-
-        await quoted_send(chat, final_txt, src)
-        try:
-            await progress.delete()
-        except:
-            pass
-
+        _, final_txt = await asyncio.gather(
+            show_typing(chat), asyncio.to_thread(_chack_text, qmode, qvalue, greens_map, yellows_np)
+        )
     except Exception as e:
-        loop_task.cancel()
-        try:
-            await loop_task
-        except:
-            pass
-        try:
-            await progress.edit_text(mdev_escape("error"), parse_mode=ParseMode.MARKDOWN_V2)
-        except:
-            pass
-        await quoted_send(chat, f"Parse error: {e}", src)
+        final_txt = f"Parse error: {e}"
 
+    await quoted_send(chat, final_txt, src)
+
+@requires_solver
+@per_chat_lock
 async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query
     if not q:
@@ -466,14 +618,14 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     data = q.data or ""
     key = (q.message.chat_id, q.message.message_id)
-    state = SESSION.get(key)
+    state = session_get(key)
 
     # Copy best
     if data.startswith("copy:"):
-        parts = data.split(":", 1)
-        if len(parts) == 2 and parts:
+        word = data.partition(":")[2]
+        if word:
             await q.answer()
-            await q.message.reply_text(mdev_escape(f"`{parts}`"), parse_mode=ParseMode.MARKDOWN_V2)
+            await q.message.reply_text(mdev_escape(f"`{word}`"), parse_mode=_MDV2)
             return
         await q.answer("Bad data")
         return
@@ -481,35 +633,24 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Pagination for .db analysis list
     if data.startswith("pg:") and state:
         try:
-            page = int(data.split(":", 1))
+            page = int(data.split(":", 1)[1])
         except:
             await q.answer("Invalid page")
             return
-        ranked = state.get("ranked", [])
-        best = state.get("best", "")
-        total = len(ranked)
-        start = max(0, page * PAGE_SIZE)
-        end = min(start + PAGE_SIZE, total)
-        if start >= total:
+        if not 0 <= page < len(state["pages_md"]):
             await q.answer("No more pages")
             return
+        new_md, markup = render_db_page(state, page)
+        await q.edit_message_text(new_md, parse_mode=_MDV2, reply_markup=markup)
         state["page"] = page
-        top_list = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(ranked[start:end], start=start))
-        text = q.message.text or ""
-        base = text.split("Top suggestions")
-        new_msg = base + f"Top suggestions \\(page {page+1}\\):\n{top_list}"
-        await q.edit_message_text(
-            mdev_escape(new_msg),
-            parse_mode=ParseMode.MARKDOWN_V2,
-            reply_markup=build_keyboard(best, page, end < total, page > 0)
-        )
+        state["last_rendered"] = new_md
         await q.answer()
         return
 
     # Find-mode chooser buttons
     if data.startswith("findmode:"):
         _, chosen = data.split(":", 1)  # "smart" or "normal"
-        st = SESSION.get((q.message.chat_id, q.message.message_id))
+        st = state
         if not st or st.get("mode") != "find-choose":
             await q.answer("Session expired")
             return
@@ -520,45 +661,23 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         title = st.get("title", "Find results")
 
         if qtype == "letter":
-            base = filter_by_letter(qvalue, solver.words)  # list[str]
-            if chosen == "smart":
-                ranked = solver.rank_words(base)           # list[(w,score)]
-                st["find_smart_ranked"] = ranked
-                page = 0
-                text, has_next, has_prev = render_ranked_list(ranked, page, f"Smart find — {title}")
-                kb = make_find_keyboard_with_ns(page, has_next, has_prev, "smart")
-                await q.edit_message_text(mdev_escape(text), parse_mode=ParseMode.MARKDOWN_V2, reply_markup=kb)
-                st["mode"] = "find-smart"
-                st["page"] = page
-            else:
-                items = sorted(base)
-                st["find_normal_items"] = items
-                page = 0
-                text, has_next, has_prev = render_find_list(items, page, f"Find words — {title}")
-                kb = make_find_keyboard_with_ns(page, has_next, has_prev, "normal")
-                await q.edit_message_text(mdev_escape(text), parse_mode=ParseMode.MARKDOWN_V2, reply_markup=kb)
-                st["mode"] = "find-normal"
-                st["page"] = page
+            base = filter_by_letter(qvalue, _State.solver)
         else:
-            base = filter_by_pattern_and_yellows(qvalue, yellows_np, solver.words)
-            if chosen == "smart":
-                ranked = solver.rank_words(base)
-                st["find_smart_ranked"] = ranked
-                page = 0
-                text, has_next, has_prev = render_ranked_list(ranked, page, f"Smart find — {title}")
-                kb = make_find_keyboard_with_ns(page, has_next, has_prev, "smart")
-                await q.edit_message_text(mdev_escape(text), parse_mode=ParseMode.MARKDOWN_V2, reply_markup=kb)
-                st["mode"] = "find-smart"
-                st["page"] = page
-            else:
-                items = sorted(base)
-                st["find_normal_items"] = items
-                page = 0
-                text, has_next, has_prev = render_find_list(items, page, f"Find words — {title}")
-                kb = make_find_keyboard_with_ns(page, has_next, has_prev, "normal")
-                await q.edit_message_text(mdev_escape(text), parse_mode=ParseMode.MARKDOWN_V2, reply_markup=kb)
-                st["mode"] = "find-normal"
-                st["page"] = page
+            base = filter_by_pattern_and_yellows(qvalue, yellows_np, _State.solver)
+
+        if chosen == "smart":
+            ranked = await asyncio.to_thread(rank_cached, base)
+            lines = [f"{i}. {w} ({sc})" for i, (w, sc) in enumerate(ranked, 1)]
+            title = f"Smart find — {title}"
+        else:
+            chosen = "normal"
+            lines = [f"{i}. {w}" for i, w in enumerate(sorted(base), 1)]
+            title = f"Find words — {title}"
+        st["find_pages"] = find_pages_md(lines, title)
+        text_md, kb = find_page_view(st["find_pages"], 0, chosen)
+        await q.edit_message_text(text_md, parse_mode=_MDV2, reply_markup=kb)
+        st["mode"] = f"find-{chosen}"
+        st["page"] = 0
 
         await q.answer()
         return
@@ -576,50 +695,48 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await q.answer("Invalid page")
             return
 
-        st = SESSION.get((q.message.chat_id, q.message.message_id))
+        st = state
         if not st or not st.get("mode", "").startswith("find-"):
             await q.answer("Session expired")
             return
 
-        title = st.get("title", "Find results")
-        if mode_tag == "smart" and st["mode"] == "find-smart":
-            ranked = st.get("find_smart_ranked", [])
-            text, has_next, has_prev = render_ranked_list(ranked, page, f"Smart find — {title}")
-            kb = make_find_keyboard_with_ns(page, has_next, has_prev, "smart")
-            await q.edit_message_text(mdev_escape(text), parse_mode=ParseMode.MARKDOWN_V2, reply_markup=kb)
-            st["page"] = page
-            await q.answer()
+        if st["mode"] != f"find-{mode_tag}":
+            await q.answer("Session expired")
             return
-
-        if mode_tag == "normal" and st["mode"] == "find-normal":
-            items = st.get("find_normal_items", [])
-            if items and isinstance(items, tuple):
-                items = [w for w, _ in items]
-                st["find_normal_items"] = items
-            text, has_next, has_prev = render_find_list(items, page, f"Find words — {title}")
-            kb = make_find_keyboard_with_ns(page, has_next, has_prev, "normal")
-            await q.edit_message_text(mdev_escape(text), parse_mode=ParseMode.MARKDOWN_V2, reply_markup=kb)
-            st["page"] = page
-            await q.answer()
+        pages = st.get("find_pages", ())
+        if not 0 <= page < len(pages):
+            await q.answer("No more pages")
             return
+        text_md, kb = find_page_view(pages, page, mode_tag)
+        await q.edit_message_text(text_md, parse_mode=_MDV2, reply_markup=kb)
+        st["page"] = page
+        await q.answer()
+        return
 
     # Refresh analysis block
     if data == "refresh" and state:
-        page = state["page"]
-        ranked = state["ranked"]
-        best = state["best"]
-        total = len(ranked)
-        start = page * PAGE_SIZE
-        end = min(start + PAGE_SIZE, total)
-        top_list = "\n".join(f"{i+1}. {w} ({sc})" for i, (w, sc) in enumerate(ranked[start:end], start=start))
-        text = q.message.text or ""
-        base = text.split("Top suggestions")
-        new_msg = base + f"Top suggestions \\(page {page+1}\\):\n{top_list}"
-        await q.edit_message_text(
-            mdev_escape(new_msg),
-            parse_mode=ParseMode.MARKDOWN_V2,
-            reply_markup=build_keyboard(best, page, end < total, page > 0)
-        )
+        if state.get("text") and state.get("wordlist_stamp") != _State.wordlist_stamp:
+            # the wordlist changed since this was rendered; redo the analysis on the new one
+            try:
+                pairs, result, ranked = await asyncio.to_thread(_cached_solve_and_rank, state["text"], _State.version)
+            except Exception as e:
+                await q.answer(f"Refresh failed: {e}"[:200])
+                return
+            if not result["candidates"]:
+                SESSION.pop(key, None)
+                await q.edit_message_text(mdev_escape(_format_no_candidates(result)), parse_mode=_MDV2)
+                await q.answer("Refreshed")
+                return
+            _, _, fresh = _render_db_analysis(state["text"], pairs, result, ranked)
+            fresh["page"] = min(state["page"], len(fresh["pages_md"]) - 1)
+            fresh["last_rendered"] = state.get("last_rendered")
+            state.update(fresh)
+        new_md, markup = render_db_page(state, state["page"])
+        if new_md == state.get("last_rendered"):
+            await q.answer("Already fresh")
+            return
+        await q.edit_message_text(new_md, parse_mode=_MDV2, reply_markup=markup)
+        state["last_rendered"] = new_md
         await q.answer("Refreshed")
         return
 
@@ -632,14 +749,66 @@ async def find_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def chack_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await chack_cmd(update, context)
 
+_DOT_RE = re.compile(r"^\s*\.(db|gn|yl|find|chack)(?:\s+(.*?))?\s*$", re.S)
+# trigger -> (handler, takes arguments); argument-less triggers only fire when sent bare
+DOT_HANDLERS = {
+    "db": (dot_db_cmd, False), "gn": (gn_cmd, False), "yl": (yl_cmd, False),
+    "find": (find_cmd, True), "chack": (chack_cmd, True),
+}
+
+# dot commands open the sessions callbacks mutate, so they queue behind them per chat
+@per_chat_lock
+async def dot_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not update.message or not update.message.text:
+        return
+    m = _DOT_RE.match(update.message.text)
+    if not m:
+        return
+    trigger, rest = m.groups()
+    fn, takes_args = DOT_HANDLERS[trigger]
+    if takes_args:
+        context.args = rest.split() if rest else []
+    elif rest:
+        return
+    await fn(update, context)
+
+# long-lived tasks started in post_init; run_polling keeps using the same loop, so they
+# run once polling starts and are cancelled in post_shutdown
+_BACKGROUND_TASKS: "list[asyncio.Task]" = []
+
+async def load_solver_in_background():
+    path = abs_path(WORDLIST_PATH)
+    try:
+        await load_solver(path)
+    except Exception:
+        log.exception("Loading %s failed", path)
+        return
+    log.info("Loaded %d words from %s", len(_State.solver.words), path)
+
+async def post_init(app):
+    restore_sessions()
+    _BACKGROUND_TASKS.append(asyncio.create_task(load_solver_in_background()))
+    if SESSION_PATH:
+        _BACKGROUND_TASKS.append(asyncio.create_task(snapshot_sessions_loop()))
+
+async def post_shutdown(app):
+    for task in _BACKGROUND_TASKS:
+        task.cancel()
+    await asyncio.gather(*_BACKGROUND_TASKS, return_exceptions=True)
+    _BACKGROUND_TASKS.clear()
+    await save_sessions()
+    if _State.pool:
+        _State.pool.shutdown(wait=False, cancel_futures=True)
+
 def main():
-    global solver
     if not TOKEN:
         raise SystemExit("Set BOT_TOKEN")
-    path = abs_path(WORDLIST_PATH)
-    solver = WordleSolver.from_file(path)
 
-    app = ApplicationBuilder().token(TOKEN).build()
+    # solves run off the event loop, so let updates from different chats overlap
+    app = (
+        ApplicationBuilder().token(TOKEN).concurrent_updates(CONCURRENT_UPDATES).rate_limiter(AIORateLimiter())
+        .post_init(post_init).post_shutdown(post_shutdown).build()
+    )
 
     app.add_handler(CommandHandler("start", start_cmd))
     app.add_handler(CommandHandler("help", help_cmd))
@@ -654,28 +823,12 @@ def main():
     app.add_handler(CommandHandler("find", find_entry))
     app.add_handler(CommandHandler("chack", chack_entry))
 
-    async def dot_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        if not update.message or not update.message.text:
-            return
-        t = update.message.text.strip()
-        if t == ".db":
-            await dot_db_cmd(update, context)
-        elif t == ".gn":
-            await gn_cmd(update, context)
-        elif t == ".yl":
-            await yl_cmd(update, context)
-        elif t.startswith(".find"):
-            parts = t.split()
-            context.args = parts[1:] if len(parts) > 1 else []
-            await find_cmd(update, context)
-        elif t.startswith(".chack"):
-            parts = t.split()
-            context.args = parts[1:] if len(parts) > 1 else []
-            await chack_cmd(update, context)
-
-    app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), dot_router))
+    app.add_handler(MessageHandler(filters.Regex(_DOT_RE) & (~filters.COMMAND), dot_router))
     app.add_handler(CallbackQueryHandler(on_callback))
-    app.run_polling(drop_pending_updates=True, poll_interval=0.5)
+    app.run_polling(
+        drop_pending_updates=True, poll_interval=0.0, timeout=30,
+        allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY]
+    )
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,13 @@
+import os
 import re
+import json
+import math
+import heapq
+import tempfile
+import functools
 import unicodedata
 from collections import Counter, defaultdict
+from operator import itemgetter
 from typing import List, Tuple, Dict
 
 EMOJI_GREEN = "🟩"
@@ -8,160 +15,204 @@ EMOJI_YELLOW = "🟨"
 EMOJI_GRAY = "🟥"
 ALT_GRAY = {"⬛", "⬜"}
 
-VALID_FB = {"G", "Y", "B"}
 MDV2_SPECIALS = r"_*[]()~`>#+-=|{}.!"
 
+_MDV2_TABLE = str.maketrans({c: "\\" + c for c in MDV2_SPECIALS})
+
 def mdev_escape(text: str) -> str:
-    out = []
-    for ch in text:
-        if ch in MDV2_SPECIALS:
-            out.append("\\" + ch)
-        else:
-            out.append(ch)
-    return "".join(out)
+    return text.translate(_MDV2_TABLE)
+
+class _NormalizeTable(dict):
+    # str.translate table that classifies each code point the first time it is seen:
+    # tiles, letters and whitespace stay, "-_'" become spaces, everything else is dropped
+    def __missing__(self, cp):
+        ch = chr(cp)
+        out = ch if ch.isalpha() or ch.isspace() else None
+        self[cp] = out
+        return out
+
+_NORMALIZE_TABLE = _NormalizeTable({ord(c): " " for c in "-_'"})
+_NORMALIZE_TABLE.update({ord(c): c for c in (EMOJI_GREEN, EMOJI_YELLOW, EMOJI_GRAY)})
+_NORMALIZE_TABLE.update({ord(c): EMOJI_GRAY for c in ALT_GRAY})
 
 def normalize_text(s: str) -> str:
-    s = unicodedata.normalize("NFKC", s)
-    for blk in ALT_GRAY:
-        s = s.replace(blk, EMOJI_GRAY)
-    cleaned = []
-    for ch in s:
-        if ch in (EMOJI_GREEN, EMOJI_YELLOW, EMOJI_GRAY):
-            cleaned.append(ch); continue
-        if ch.isalpha() or ch.isspace():
-            cleaned.append(ch); continue
-        if ch in "-_'":
-            cleaned.append(" "); continue
-    return "".join(cleaned)
+    return unicodedata.normalize("NFKC", s).translate(_NORMALIZE_TABLE)
 
+@functools.lru_cache(maxsize=65536)
 def strip_to_ascii_letters(word: str) -> str:
     w = unicodedata.normalize("NFKC", word)
     w = "".join(ch for ch in w if ch.isalpha())
     return w.lower()
 
+_TILE_RE = re.compile(rf"^([{EMOJI_GREEN}{EMOJI_YELLOW}{EMOJI_GRAY}\s]{{5,}})\s+([A-Za-z\s]{{3,}})$")
+_TILE_TRANS = str.maketrans({EMOJI_GREEN: "G", EMOJI_YELLOW: "Y", EMOJI_GRAY: "B"})
+
+# "GYBBY WORD" or "G Y B B Y WORD"
+_SHORT_RE = re.compile(r"(?:([GYB]{5})|([GYB])\s+([GYB])\s+([GYB])\s+([GYB])\s+([GYB]))\s+(\S+)", re.I)
+
 def parse_line(line: str):
     s = normalize_text(line).strip()
     if not s: return None
-    m = re.match(rf"^([{EMOJI_GREEN}{EMOJI_YELLOW}{EMOJI_GRAY}\s]{{5,}})\s+([A-Za-z\s]{{3,}})$", s)
+    m = _TILE_RE.match(s)
     if m:
         tiles_raw, word_raw = m.group(1), m.group(2)
-        tiles = [ch for ch in tiles_raw if ch in (EMOJI_GREEN, EMOJI_YELLOW, EMOJI_GRAY)]
-        if len(tiles) != 5:
+        # the regex only lets tiles and whitespace through, so translate and drop the gaps
+        fb = "".join(tiles_raw.translate(_TILE_TRANS).split())
+        if len(fb) != 5:
             return None
-        fb = "".join("G" if ch == EMOJI_GREEN else "Y" if ch == EMOJI_YELLOW else "B" for ch in tiles)
         word = strip_to_ascii_letters(word_raw)
         if len(word) != 5:
             return None
         return (word, fb)
-    toks = s.split()
-    if len(toks) >= 2:
-        patt, last = toks, toks[-1]
-        if len(patt) == 5 and set(patt.upper()).issubset(VALID_FB):
-            w = strip_to_ascii_letters(last)
-            if len(w) == 5:
-                return (w, patt.upper())
-    if len(toks) >= 6:
-        flags = [t.upper() for t in toks[:5]]
-        if all(t in VALID_FB for t in flags):
-            w = strip_to_ascii_letters(toks)
-            if len(w) == 5:
-                return (w, "".join(flags))
+    m = _SHORT_RE.fullmatch(s)
+    if m:
+        flags = m.group(1) or "".join(m.group(2, 3, 4, 5, 6))
+        w = strip_to_ascii_letters(m.group(7))
+        if len(w) == 5:
+            return (w, flags.upper())
     return None
 
+# Every accepted line carries a feedback token: a tile emoji, or five G/Y/B flags standing
+# apart from other letters. Flags may be joined or separated by anything normalize_text turns
+# into spaces or drops ("G Y B B Y", "G-Y-B-B-Y"), so any non-letters count as a separator.
+# Text without a token is rejected before any line is parsed.
+_SNIFF_RE = re.compile(
+    rf"[{EMOJI_GREEN}{EMOJI_YELLOW}{EMOJI_GRAY}{''.join(ALT_GRAY)}]"
+    r"|(?<![A-Za-z])[GYB](?:[^A-Za-z\n]*[GYB]){4}(?![A-Za-z])",
+    re.I,
+)
+
+def _has_feedback(text: str) -> bool:
+    if _SNIFF_RE.search(text):
+        return True
+    # fullwidth, math-bold or circled flags only match once NFKC-folded; ASCII text can't contain them
+    return not text.isascii() and _SNIFF_RE.search(unicodedata.normalize("NFKC", text)) is not None
+
 def extract_guess_pairs_from_text(text: str):
     pairs = []
-    for raw in text.splitlines():
-        p = parse_line(raw)
-        if p:
-            pairs.append(p)
+    if _has_feedback(text):
+        for raw in text.splitlines():
+            p = parse_line(raw)
+            if p:
+                pairs.append(p)
     if not pairs:
         raise ValueError("No valid guess lines found. Use emojis+word, 'GYBBY WORD', or 'G Y B B Y WORD'.")
     return pairs
 
 def accumulate_constraints(guesses: List[Tuple[str, str]]):
+    # a growing guess list is re-accumulated on every reply, so results are memoized;
+    # the returned dicts are shared between callers and must not be mutated
+    return _accumulate(tuple(guesses))
+
+@functools.lru_cache(maxsize=256)
+def _accumulate(guesses: Tuple[Tuple[str, str], ...]):
     greens: Dict[int, str] = {}
-    yellows_not_pos: Dict[str, set] = defaultdict(set)
-    global_min = Counter()
+    # letter -> bit i set when a yellow banned it from position i; merging guesses is just |=
+    yellow_bans: Dict[str, int] = {}
+    global_min: Dict[str, int] = {}
     global_max_known: Dict[str, int] = {}
 
     for word, fb in guesses:
-        gy_counts = Counter()
+        gy_counts: Dict[str, int] = {}
+        grayed = []
+        yellowed = set()
         for i, (ch, fl) in enumerate(zip(word, fb)):
             if fl == "G":
                 greens[i] = ch
-                gy_counts[ch] += 1
             elif fl == "Y":
-                yellows_not_pos[ch].add(i)
-                gy_counts[ch] += 1
                 # ✅ Yellow ka matlab: letter must exist somewhere
-                if global_min[ch] < gy_counts[ch]:
-                    global_min[ch] = gy_counts[ch]
-
-        # per-guess maximums (gray handling with duplicates)
-        per_guess_max = {}
-        gc = Counter(word)
-        for l, k in gc.items():
-            r = gy_counts[l]
-            if r < k:
-                per_guess_max[l] = r
+                yellow_bans[ch] = yellow_bans.get(ch, 0) | 1 << i
+                yellowed.add(ch)
+            else:
+                grayed.append((i, ch))
+                continue
+            gy_counts[ch] = gy_counts.get(ch, 0) + 1
 
         # update global mins
         for l, r in gy_counts.items():
-            if r > global_min[l]:
+            if r > global_min.get(l, 0):
                 global_min[l] = r
 
-        # update global max-known
-        for l, mx in per_guess_max.items():
+        # a gray copy caps the letter at its green/yellow copies in this guess (duplicate handling)
+        for i, l in grayed:
+            mx = gy_counts.get(l, 0)
             global_max_known[l] = min(global_max_known.get(l, mx), mx)
+            # and when a copy was yellow, the gray spot is one more place the letter can't be
+            if l in yellowed:
+                yellow_bans[l] |= 1 << i
 
-    return greens, yellows_not_pos, dict(global_min), global_max_known
-    
-def word_satisfies(word, greens, yellows_not_pos, min_counts, max_counts):
-    # ✅ Green exact match
-    for i, ch in greens.items():
-        if word[i] != ch:
-            return False
+    # key-ordered dicts and sorted ban tuples, so callers can render without re-sorting
+    return (
+        dict(sorted(greens.items())),
+        {ch: tuple(i for i in range(5) if ban >> i & 1) for ch, ban in sorted(yellow_bans.items())},
+        dict(sorted(global_min.items())),
+        dict(sorted(global_max_known.items())),
+    )
 
-    # ✅ Yellow must exist, but not at banned positions
-    for ch, banned in yellows_not_pos.items():
-        if ch not in word:
-            return False
-        for pos in banned:
-            if word[pos] == ch:
-                return False
-
-    # ✅ Check minimum counts
-    wc = Counter(word)
-    for l, m in min_counts.items():
-        if wc[l] < m:
-            return False
-
-    # ✅ Check maximum counts
-    for l, mx in max_counts.items():
-        if wc[l] > mx:
-            return False
-
-    return True
 def positional_frequencies(words: List[str]):
-    pos_freq = [Counter() for _ in range(5)]
+    # Counter's C counting loop over each column; the global tally is the sum of the columns
+    pos_freq = [Counter(map(itemgetter(i), words)) for i in range(5)]
     global_freq = Counter()
-    for w in words:
-        for i, ch in enumerate(w):
-            pos_freq[i][ch] += 1
-            global_freq[ch] += 1
+    for col in pos_freq:
+        global_freq.update(col)
     return pos_freq, global_freq
 
-def intelligent_scores(cands: List[str]):
+VOWELS = frozenset("aeiou")
+
+def word_static_terms(w: str):
+    # parts of the score that depend only on the word itself
+    uniq = tuple(dict.fromkeys(w))
+    return uniq, sum(1 for ch in uniq if ch in VOWELS) * 50 - (len(w) - len(uniq)) * 100
+
+def intelligent_scores(cands: List[str], static=None):
     pos_freq, global_freq = positional_frequencies(cands)
-    vowels = set("aeiou")
+    f0, f1, f2, f3, f4 = pos_freq
+    # every letter of every candidate was counted, so plain dict lookups never miss
+    freq_of = dict(global_freq).__getitem__
     scores = {}
     for w in cands:
-        uniq = list(dict.fromkeys(w))
-        pos_score = sum(pos_freq[i][ch] for i, ch in enumerate(w))
-        cov_score = sum(global_freq[ch] for ch in uniq)
-        vowel_bonus = sum(1 for ch in uniq if ch in vowels) * 50
-        dup_pen = (len(w) - len(uniq)) * 100
-        scores[w] = pos_score + cov_score + vowel_bonus - dup_pen
+        terms = static.get(w) if static else None
+        uniq, base = terms or word_static_terms(w)
+        pos_score = f0[w[0]] + f1[w[1]] + f2[w[2]] + f3[w[3]] + f4[w[4]]
+        cov_score = sum(map(freq_of, uniq))
+        scores[w] = pos_score + cov_score + base
+    return scores
+
+def feedback_code(guess: str, answer: str) -> int:
+    # Wordle feedback as a base-3 number (gray 0, yellow 1, green 2), first tile most significant
+    tiles = [0] * 5
+    unmatched = []
+    for i in range(5):
+        if guess[i] == answer[i]:
+            tiles[i] = 2
+        else:
+            unmatched.append(answer[i])
+    for i in range(5):
+        if tiles[i] == 0 and guess[i] in unmatched:
+            tiles[i] = 1
+            unmatched.remove(guess[i])
+    return tiles[0] * 81 + tiles[1] * 27 + tiles[2] * 9 + tiles[3] * 3 + tiles[4]
+
+# best score first, alphabetical among ties
+def _rank_key(item):
+    return (-item[1], item[0])
+
+# per-solver bound on memoized single-guess masks; the cache is simply dropped when full
+GUESS_MASK_CACHE_MAX = 4096
+
+# Entropy costs |cands|^2 feedback computations, so it only takes over once the pool is this small
+ENTROPY_MAX_CANDIDATES = 128
+
+def entropy_scores(cands: List[str]):
+    # expected information (in millibits) from guessing each candidate against the remaining pool
+    n = len(cands)
+    log_n = math.log2(n)
+    scores = {}
+    for g in cands:
+        if g in scores:
+            continue
+        buckets = Counter(feedback_code(g, a) for a in cands)
+        scores[g] = round((log_n - sum(c * math.log2(c) for c in buckets.values()) / n) * 1000)
     return scores
 
 def allowed_letters_by_position(greens, yellows_not_pos, min_counts=None, max_counts=None):
@@ -192,14 +243,48 @@ def green_patterns_lines(greens):
 
 def yellow_patterns_lines(yellows_not_pos):
     lines = []
-    for ch, posset in sorted(yellows_not_pos.items()):
-        bans = ", ".join(str(i+1) for i in sorted(posset)) if posset else "-"
+    for ch, posset in yellows_not_pos.items():
+        bans = ", ".join(str(i+1) for i in posset) if posset else "-"
         lines.append(f"Yellow {ch.upper()}: not at {bans}")
     return lines if lines else ["Yellow pattern: —"]
 
+# bit offsets set in each byte value, for decoding dense word masks a byte at a time
+_BYTE_BITS = tuple(tuple(b for b in range(8) if v >> b & 1) for v in range(256))
+
+_VALID_WORD = re.compile(r"[a-z]{5}").fullmatch
+
+# bump when sanitizing or scoring changes so stale wordlist caches are rebuilt
+CACHE_FORMAT = 4
+
 class WordleSolver:
-    def __init__(self, words: List[str]):
-        self.words = [w for w in words if len(w)==5 and w.isalpha() and w.islower()]
+    def __init__(self, words: List[str], global_ranked=None):
+        # one C-level check per word; repeats in the list would only skew frequencies and repeat suggestions
+        self.words = list(dict.fromkeys(w for w in words if _VALID_WORD(w)))
+        # column bitsets: bit k of pos_bits[(i, ch)] is set when words[k][i] == ch,
+        # so constraint filters become a handful of big-int AND/OR ops over the whole list
+        self.pos_bits: Dict[Tuple[int, str], int] = defaultdict(int)
+        self.has_bits: Dict[str, int] = defaultdict(int)
+        # multi_bits[(ch, n)]: words with at least n copies of ch (n >= 2), for duplicate-letter counts
+        self.multi_bits: Dict[Tuple[str, int], int] = defaultdict(int)
+        for k, w in enumerate(self.words):
+            bit = 1 << k
+            for i, ch in enumerate(w):
+                self.pos_bits[(i, ch)] |= bit
+                self.has_bits[ch] |= bit
+            if len(set(w)) < 5:
+                for ch, n in Counter(w).items():
+                    for m in range(2, n + 1):
+                        self.multi_bits[(ch, m)] |= bit
+        self.all_bits = (1 << len(self.words)) - 1
+        # (letter, 5-bit banned-position mask) -> words holding the letter outside those positions; filled lazily
+        self._yellow_bits: Dict[Tuple[str, int], int] = {}
+        # (word, feedback) -> words consistent with that one guess; see solve()
+        self._guess_masks: Dict[Tuple[str, str], int] = {}
+        # letter -> words containing it, for single-letter /find and /chack queries
+        self.by_letter = {ch: tuple(self.words_in_mask(bits)) for ch, bits in self.has_bits.items()}
+        self.static_terms = {w: word_static_terms(w) for w in self.words}
+        # whole-list ranking is constant for a wordlist; /top and global suggestions reuse it
+        self.global_ranked = global_ranked if global_ranked is not None else self.rank_words(self.words)
 
     @staticmethod
     def sanitize_word_list(raw_lines: List[str]) -> List[str]:
@@ -212,27 +297,148 @@ class WordleSolver:
 
     @classmethod
     def from_file(cls, path: str):
+        # sanitized words and the full-list ranking are cached beside the wordlist,
+        # keyed on its mtime and size, so restarts skip re-ranking an unchanged file
+        st = os.stat(path)
+        stamp = [CACHE_FORMAT, st.st_mtime_ns, st.st_size]
+        cache_path = path + ".cache.json"
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached["stamp"] == stamp:
+                return cls(cached["words"], [tuple(it) for it in cached["ranked"]])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        # one read and a C-level split; sanitize_word_list drops blank and padded lines anyway
         with open(path, "r", encoding="utf-8") as f:
-            raw = [ln.strip() for ln in f if ln.strip()]
-        words = cls.sanitize_word_list(raw)
-        return cls(words)
+            raw = f.read().splitlines()
+        solver = cls(cls.sanitize_word_list(raw))
+        # written to a temp file and renamed over, so a crash or a second process (pool workers
+        # load the same list) never leaves a half-written cache behind
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(cache_path) or ".", prefix="." + os.path.basename(path) + ".", suffix=".cache.json"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"stamp": stamp, "words": solver.words, "ranked": solver.global_ranked}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+        return solver
+
+    def at_least_bits(self, ch: str, n: int) -> int:
+        if n <= 0:
+            return self.all_bits
+        if n == 1:
+            return self.has_bits.get(ch, 0)
+        return self.multi_bits.get((ch, n), 0)
+
+    def yellow_bits(self, ch: str, ban: int) -> int:
+        bits = self._yellow_bits.get((ch, ban))
+        if bits is None:
+            bits = self.has_bits.get(ch, 0)
+            for pos in range(5):
+                if ban >> pos & 1:
+                    bits &= ~self.pos_bits.get((pos, ch), 0)
+            self._yellow_bits[(ch, ban)] = bits
+        return bits
+
+    def match_mask(self, greens, yellows_not_pos, min_counts=None, max_counts=None) -> int:
+        mask = self.all_bits
+        for i, ch in greens.items():
+            mask &= self.pos_bits.get((i, ch), 0)
+        for ch, banned in yellows_not_pos.items():
+            ban = 0
+            for pos in banned:
+                ban |= 1 << pos
+            mask &= self.yellow_bits(ch, ban)
+        if min_counts:
+            for ch, mn in min_counts.items():
+                mask &= self.at_least_bits(ch, mn)
+        if max_counts:
+            for ch, mx in max_counts.items():
+                mask &= ~self.at_least_bits(ch, mx + 1)
+        return mask
+
+    def ids_in_mask(self, mask: int) -> List[int]:
+        if mask.bit_count() <= 64:
+            ids = []
+            while mask:
+                low = mask & -mask
+                ids.append(low.bit_length() - 1)
+                mask ^= low
+            return ids
+        # dense masks: one to_bytes pass, then only the nonzero bytes are expanded
+        data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+        return [(i << 3) + b for i, v in enumerate(data) if v for b in _BYTE_BITS[v]]
+
+    def words_in_mask(self, mask: int) -> List[str]:
+        if mask == self.all_bits:
+            return list(self.words)
+        words = self.words
+        return [words[i] for i in self.ids_in_mask(mask)]
+
+    def pattern_matches(self, greens, yellows_not_pos) -> List[str]:
+        return self.words_in_mask(self.match_mask(greens, yellows_not_pos))
+
+    def guess_mask(self, word: str, fb: str) -> int:
+        mask = self._guess_masks.get((word, fb))
+        if mask is None:
+            if len(self._guess_masks) >= GUESS_MASK_CACHE_MAX:
+                self._guess_masks.clear()
+            # _guess_masks is this result's cache; going through the shared _accumulate LRU would
+            # only evict the multi-guess entries it keeps for replies
+            mask = self.match_mask(*_accumulate.__wrapped__(((word, fb),)))
+            self._guess_masks[(word, fb)] = mask
+        return mask
 
     def solve(self, guesses: List[Tuple[str, str]]):
+        # every guess constrains independently, so the answer set is the AND of per-guess masks;
+        # replies grow a line at a time, and only the new line's mask has to be built
+        mask = self.all_bits
+        for word, fb in dict.fromkeys(guesses):
+            mask &= self.guess_mask(word, fb)
         greens, yellows_not_pos, min_counts, max_counts = accumulate_constraints(guesses)
-        cands = [w for w in self.words if word_satisfies(w, greens, yellows_not_pos, min_counts, max_counts)]
         return {
             "greens": greens,
             "yellows_not_pos": yellows_not_pos,
             "min_counts": min_counts,
             "max_counts": max_counts,
-            "candidates": cands,
+            "candidates": self.words_in_mask(mask),
         }
 
-    def rank_words(self, words: List[str]):
+    def rank_words(self, words: List[str], k: int | None = None):
+        # k keeps only the best k; scoring is still over all words, but the sort becomes a heap select
         if not words: return []
-        scores = intelligent_scores(words)
+        scores = intelligent_scores(words, self.static_terms)
         items = [(w, scores[w]) for w in words]
-        return sorted(items, key=lambda x: (-x, x))
+        key = _rank_key
+        if len(words) <= ENTROPY_MAX_CANDIDATES:
+            # entropy decides the order on small pools, but the heuristic score stays the displayed
+            # number so the same word shows a comparable value whatever the pool size
+            info = entropy_scores(words)
+            key = lambda item: (-info[item[0]], -item[1], item[0])
+        if k is not None and k < len(items):
+            return heapq.nsmallest(k, items, key=key)
+        items.sort(key=key)
+        return items
+
+# Process-pool workers each hold their own solver, loaded once by the pool initializer
+_WORKER_SOLVER = None
+
+def init_worker(path: str):
+    global _WORKER_SOLVER
+    _WORKER_SOLVER = WordleSolver.from_file(path)
+
+def worker_solve_and_rank(text: str):
+    pairs = extract_guess_pairs_from_text(text)
+    result = _WORKER_SOLVER.solve(pairs)
+    return pairs, result, _WORKER_SOLVER.rank_words(result["candidates"])
 
 def visualize_guess_line(word: str, fb: str):
     tags = []
@@ -242,31 +448,23 @@ def visualize_guess_line(word: str, fb: str):
 
 def build_constraints_report(pairs: List[Tuple[str, str]]):
     greens, ynp, minc, maxc = accumulate_constraints(pairs)
-    g_line = "Greens: " + (", ".join([f"{i+1}:{ch}" for i, ch in sorted(greens.items())]) or "-")
+    g_line = "Greens: " + (", ".join([f"{i+1}:{ch}" for i, ch in greens.items()]) or "-")
     y_lines = []
-    for ch, posset in sorted(ynp.items()):
-        y_lines.append(f"{ch}: not at {', '.join(str(i+1) for i in sorted(posset))}")
+    for ch, posset in ynp.items():
+        y_lines.append(f"{ch}: not at {', '.join(str(i+1) for i in posset)}")
     y_block = "Yellows (position bans): " + (", ".join(y_lines) if y_lines else "-")
-    min_line = "Min counts: " + (", ".join([f"{l}:{v}" for l, v in sorted(minc.items())]) or "-")
-    max_line = "Max counts: " + (", ".join([f"{l}:{v}" for l, v in sorted(maxc.items())]) or "-")
-    letters_seen = sorted({l for w, fb in pairs for l in set(w)})
+    min_line = "Min counts: " + (", ".join([f"{l}:{v}" for l, v in minc.items()]) or "-")
+    max_line = "Max counts: " + (", ".join([f"{l}:{v}" for l, v in maxc.items()]) or "-")
+    letters_seen = sorted(set("".join(w for w, _ in pairs)))
     allowed_lines = []
     for l in letters_seen:
-        allowed = []
-        for i in range(5):
-            if i in greens and greens[i] != l: continue
-            if l in ynp and i in ynp[l]: continue
-            allowed.append(str(i+1))
+        # a column is open to l unless another letter is green there or a yellow banned l from it
+        banned = ynp.get(l, ())
+        allowed = [str(i+1) for i in range(5) if greens.get(i, l) == l and i not in banned]
         if allowed:
             allowed_lines.append(f"{l}: {', '.join(allowed)}")
     allowed_block = "Allowed positions (by bans): " + (", ".join(allowed_lines) if allowed_lines else "-")
-    seen_g_y, seen_b = set(), set()
-    for w, fb in pairs:
-        for ch, f in zip(w, fb):
-            if f in ("G","Y"): seen_g_y.add(ch)
-            elif f == "B": seen_b.add(ch)
-    grays = sorted([ch for ch in seen_b if ch not in seen_g_y])
-    gray_line = "Gray-only letters: " + (", ".join(grays).upper() if grays else "-")
+    gray_line = "Gray-only letters: " + deduce_grays_display(pairs).upper()
     return "\n".join([g_line, y_block, min_line, max_line, allowed_block, gray_line])
 
 def build_pattern_string(result) -> str:
@@ -276,11 +474,9 @@ def build_pattern_string(result) -> str:
     return " ".join(patt)
 
 def deduce_grays_display(pairs: List[Tuple[str, str]]) -> str:
-    seen_g_y, seen_b = set(), set()
-    for w, fb in pairs:
-        for ch, f in zip(w, fb):
-            if f in ("G","Y"): seen_g_y.add(ch)
-            elif f == "B": seen_b.add(ch)
-    grays = sorted([ch for ch in seen_b if ch not in seen_g_y])
+    # every gray letter gets a max count and every green/yellow one a min count, so the
+    # (memoized, key-sorted) constraints already hold the gray-only letters in order
+    _, _, minc, maxc = accumulate_constraints(pairs)
+    grays = [ch for ch in maxc if ch not in minc]
     return ", ".join(grays) if grays else "-"
     
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    import main
+except ImportError:  # python-telegram-bot not installed
+    main = None
+
+
+@unittest.skipUnless(main, "python-telegram-bot is not installed")
+class RefreshTest(unittest.IsolatedAsyncioTestCase):
+    FEEDBACK = "🟩🟩🟩🟥🟥 HEART"
+
+    async def asyncSetUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "words.txt")
+        self._write(["heart", "heads", "crane"], mtime=1_000_000_000)
+        await main.load_solver(self.path)
+        self.addCleanup(main.SESSION.clear)
+
+    def _write(self, words, mtime):
+        with open(self.path, "w") as f:
+            f.write("\n".join(words) + "\n")
+        os.utime(self.path, (mtime, mtime))
+
+    def _open_db_message(self, key):
+        pairs, result, ranked = main._cached_solve_and_rank(self.FEEDBACK, main._State.version)
+        _, _, state = main._render_db_analysis(self.FEEDBACK, pairs, result, ranked)
+        main.session_put(key, state)
+        return state
+
+    def _refresh(self, key):
+        q = mock.AsyncMock(data="refresh")
+        q.message.chat_id, q.message.message_id = key
+        update = mock.Mock(callback_query=q, effective_chat=mock.Mock(id=key[0]))
+        return q, main.on_callback(update, None)
+
+    async def test_refresh_unchanged_is_noop(self):
+        key = (1, 10)
+        self._open_db_message(key)
+        q, call = self._refresh(key)
+        await call
+        q.edit_message_text.assert_not_called()
+        q.answer.assert_awaited_with("Already fresh")
+
+    async def test_refresh_after_wordlist_reload_edits(self):
+        key = (1, 11)
+        state = self._open_db_message(key)
+        self.assertNotIn("heals", state["footer_md"])
+        self._write(["heart", "heads", "heals", "crane"], mtime=1_000_000_100)
+        await main.load_solver(self.path)
+
+        q, call = self._refresh(key)
+        await call
+        q.edit_message_text.assert_awaited_once()
+        self.assertIn("heals", q.edit_message_text.await_args.args[0])
+        q.answer.assert_awaited_with("Refreshed")
+
+
+@unittest.skipUnless(main, "python-telegram-bot is not installed")
+class LoadFailureTest(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_load_is_reported_instead_of_loading(self):
+        with mock.patch.object(main._State, "solver", None), mock.patch.object(main._State, "load_error", ""):
+            with self.assertRaises(OSError):
+                await main.load_solver(os.path.join(tempfile.gettempdir(), "missing-wordlist.txt"))
+            q = mock.AsyncMock(data="refresh")
+            await main.on_callback(mock.Mock(callback_query=q), None)
+            self.assertIn("failed to load", q.answer.await_args.args[0])
+
+
+@unittest.skipUnless(main, "python-telegram-bot is not installed")
+class ChatLockTest(unittest.IsolatedAsyncioTestCase):
+    async def test_locks_are_dropped_once_idle(self):
+        order = []
+
+        @main.per_chat_lock
+        async def handler(update, context):
+            order.append(("in", context))
+            await asyncio.sleep(0)
+            order.append(("out", context))
+
+        update = mock.Mock(effective_chat=mock.Mock(id=42))
+        await asyncio.gather(handler(update, 1), handler(update, 2))
+        self.assertEqual(order, [("in", 1), ("out", 1), ("in", 2), ("out", 2)])
+        self.assertNotIn(42, main._CHAT_LOCKS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import itertools
+import unittest
+
+from solver import WordleSolver, _has_feedback, extract_guess_pairs_from_text, feedback_code, parse_line
+
+# duplicate-letter heavy on purpose: doubled t/e/o, and words that put them green, yellow and gray at once
+WORDS = [
+    "putty", "tatty", "otter", "taste", "baste", "booth", "stoop", "spool", "sweet", "steel",
+    "tepee", "eerie", "geese", "crane", "caner", "react", "those", "hotel", "toast", "tools",
+]
+
+
+def wordle_feedback(guess, answer):
+    # reference scorer, written independently of feedback_code: greens first, then yellows from what's left
+    fb = ["B"] * 5
+    left = [a for g, a in zip(guess, answer) if g != a]
+    for i, (g, a) in enumerate(zip(guess, answer)):
+        if g == a:
+            fb[i] = "G"
+        elif g in left:
+            fb[i] = "Y"
+            left.remove(g)
+    return "".join(fb)
+
+
+class ExtractGuessPairsTest(unittest.TestCase):
+    def test_plain_and_emoji_lines(self):
+        self.assertEqual(
+            extract_guess_pairs_from_text("🟩🟨🟥🟥🟨 HEART\nGYBBB crane"),
+            [("heart", "GYBBY"), ("crane", "GYBBB")],
+        )
+
+    def test_feedback_that_only_matches_after_nfkc(self):
+        for text in ("𝐆𝐘𝐁𝐁𝐘 crane", "Ⓖ Ⓨ Ⓑ Ⓑ Ⓨ crane", "ＧＹＢＢＹ crane"):
+            with self.subTest(text=text):
+                self.assertEqual(extract_guess_pairs_from_text(text), [("crane", "GYBBY")])
+
+    def test_short_flag_formats(self):
+        for line in ("GYBBY crane", "gybby CRANE", "G Y B B Y crane", "g y b b y crane"):
+            with self.subTest(line=line):
+                self.assertEqual(parse_line(line), ("crane", "GYBBY"))
+        self.assertIsNone(parse_line("GYBB crane"))
+        self.assertIsNone(parse_line("G Y B B Y cranes"))
+
+    def test_text_without_feedback_is_rejected(self):
+        for text in ("hello there", "go big or go home, bye baby"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                extract_guess_pairs_from_text(text)
+
+    def test_sniff_needs_a_feedback_token(self):
+        self.assertFalse(_has_feedback("go big or go home, bye baby"))
+        self.assertFalse(_has_feedback("café bygone"))
+        for text in ("⬛⬜⬛⬛🟩 crane", "gybby crane", "G-Y-B-B-Y crane", "𝐆𝐘𝐁𝐁𝐘 crane"):
+            with self.subTest(text=text):
+                self.assertTrue(_has_feedback(text))
+
+
+class SolveTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.solver = WordleSolver(WORDS)
+
+    def brute_force(self, pairs):
+        return sorted(w for w in WORDS if all(wordle_feedback(g, w) == fb for g, fb in pairs))
+
+    def test_solve_matches_brute_force(self):
+        for answer in WORDS:
+            for guesses in itertools.combinations(WORDS[::3], 2):
+                pairs = [(g, wordle_feedback(g, answer)) for g in guesses]
+                with self.subTest(pairs=pairs):
+                    self.assertEqual(sorted(self.solver.solve(pairs)["candidates"]), self.brute_force(pairs))
+
+    def test_yellow_and_gray_on_the_same_letter(self):
+        # one t is somewhere other than 3, the other t is gray: exactly one t, and not at 3 or 4
+        pairs = [("putty", "BBYBB")]
+        self.assertEqual(sorted(self.solver.solve(pairs)["candidates"]), self.brute_force(pairs))
+        self.assertNotIn("baste", self.solver.solve(pairs)["candidates"])
+
+    def test_gray_duplicate_caps_the_count(self):
+        pairs = [("tatty", "GBBBB")]
+        result = self.solver.solve(pairs)
+        self.assertEqual(result["max_counts"]["t"], 1)
+        self.assertEqual(sorted(result["candidates"]), self.brute_force(pairs))
+
+    def test_ids_in_mask_sparse_and_dense(self):
+        solver = WordleSolver(["".join(p) for p in itertools.islice(itertools.product("abcde", repeat=5), 300)])
+        for mask in (0, 1 << 7 | 1 << 200, solver.all_bits, solver.all_bits & ~(1 << 5)):
+            with self.subTest(mask=hex(mask)):
+                self.assertEqual(solver.ids_in_mask(mask), [k for k in range(len(solver.words)) if mask >> k & 1])
+
+
+class FeedbackCodeTest(unittest.TestCase):
+    def test_known_values(self):
+        self.assertEqual(feedback_code("crane", "crane"), 242)
+        self.assertEqual(feedback_code("crane", "booth"), 0)
+        # c green, r/a/n/e all yellow: 2*81 + 27 + 9 + 3 + 1
+        self.assertEqual(feedback_code("crane", "caner"), 202)
+        # taste's two t's are both matched green, so tatty's third t stays gray
+        self.assertEqual(feedback_code("tatty", "taste"), 2 * 81 + 2 * 27 + 0 + 2 * 3 + 0)
+
+    def test_matches_reference_scorer(self):
+        digits = {"B": 0, "Y": 1, "G": 2}
+        for guess, answer in itertools.product(WORDS, repeat=2):
+            expected = 0
+            for f in wordle_feedback(guess, answer):
+                expected = expected * 3 + digits[f]
+            self.assertEqual(feedback_code(guess, answer), expected, (guess, answer))
+
+
+if __name__ == "__main__":
+    unittest.main()